@@ -104,10 +104,8 @@ async def get_ohlcv_statistics(security_id: UUID, date_from: Optional[date] = Qu
         if not ohlcv_data:
             raise NotFoundError("OHLCV data", f"security_id={security_id}")
 
-        # Calculate statistics using DhanService
-        from app.services.dhan_service import DhanService
-        dhan_service = DhanService()
-        stats = dhan_service.get_ohlcv_statistics(ohlcv_data)
+        # Calculate statistics using the service's DhanService
+        stats = ohlcv_service.dhan_service.get_ohlcv_statistics(ohlcv_data)
 
         return APIResponse(data=OHLCVStatsResponse.model_validate(stats), message=f"Statistics calculated for {len(ohlcv_data)} records")
 
@@ -359,10 +357,8 @@ async def validate_ohlcv_data(security_id: UUID, date_from: Optional[date] = Que
         if not ohlcv_data:
             return APIResponse(data={'validation_result': 'NO_DATA', 'total_records': 0, 'valid_records': 0, 'invalid_records': 0, 'data_quality_score': 0.0, 'issues': ['No OHLCV data found for the specified period']}, message="No data available for validation")
 
-        # Validate data using DhanService
-        from app.services.dhan_service import DhanService
-        dhan_service = DhanService()
-        validation_result = dhan_service.validate_ohlcv_data_integrity(ohlcv_data)
+        # Validate data using the service's DhanService
+        validation_result = ohlcv_service.dhan_service.validate_ohlcv_data_integrity(ohlcv_data)
 
         # Determine validation result status
         if validation_result['data_quality_score'] >= 95:
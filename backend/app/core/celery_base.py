@@ -2,12 +2,15 @@
 
 from typing import Any, Optional, Dict
 from celery import Task
+import time
 import traceback
 from datetime import datetime, timezone
 
 from app.utils.enum import TaskStatus
 from app.core.database import init_database
 from app.core.config import settings
+from app.models.tasks import TaskStep, TaskLog
+from app.services.task_service import TaskService
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -65,6 +68,7 @@ class DatabaseTask(BaseTask):
         self._task_run = None
         self._current_step = None
         self._step_order = 0
+        self._last_progress_at = 0.0
 
     @property
     def db(self):
@@ -90,7 +94,6 @@ class DatabaseTask(BaseTask):
         """Get or find the TaskRun record for this task"""
         if self._task_run is None:
             try:
-                from app.services.task_service import TaskService
                 task_id = getattr(self.request, 'id', None)
 
                 if task_id:
@@ -115,8 +118,6 @@ class DatabaseTask(BaseTask):
             bool: True if step was created successfully
         """
         try:
-            from app.models.tasks import TaskStep
-
             task_run = self.get_task_run()
             if not task_run:
                 self.logger.warning("No TaskRun found, cannot create step")
@@ -155,8 +156,6 @@ class DatabaseTask(BaseTask):
             bool: True if step was updated successfully
         """
         try:
-            from app.models.tasks import TaskStep
-
             task_run = self.get_task_run()
             if not task_run:
                 return False
@@ -201,8 +200,6 @@ class DatabaseTask(BaseTask):
             bool: True if log was created successfully
         """
         try:
-            from app.models.tasks import TaskLog
-
             task_run = self.get_task_run()
             if not task_run:
                 return False
@@ -242,8 +239,6 @@ class DatabaseTask(BaseTask):
             # Update TaskRun record
             task_run = self.get_task_run()
             if task_run:
-                from app.services.task_service import TaskService
-
                 progress_percentage = current if total == 100 else round((current / total) * 100, 2)
 
                 task_service = TaskService(self.db)
@@ -260,6 +255,24 @@ class DatabaseTask(BaseTask):
         except Exception as e:
             self.logger.warning(f"Failed to update comprehensive progress: {e}")
 
+    def _update_progress_throttled(self, current: int, message: str, total: int = 100, min_interval: float = 2.0):
+        """
+        Update progress at most once per min_interval seconds, for loops that report per item.
+        Completion (current >= total) is always written.
+        
+        Args:
+            current: Current progress value (0-100 if total=100)
+            message: Progress message
+            total: Total progress value (default 100 for percentage)
+            min_interval: Minimum seconds between two written updates
+        """
+        now = time.monotonic()
+        if current < total and now - self._last_progress_at < min_interval:
+            return
+
+        self._last_progress_at = now
+        self._update_progress(current, message, total)
+
     def _update_task_status(self, status: TaskStatus, **update_data):
         """
         Update TaskRun status and related fields
@@ -273,8 +286,6 @@ class DatabaseTask(BaseTask):
             if not task_run:
                 return
 
-            from app.services.task_service import TaskService
-
             update_fields = {'status': status, **update_data}
 
             # Set completion time for terminal statuses
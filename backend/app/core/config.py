@@ -66,6 +66,8 @@ class ExternalAPISettings(BaseSettings):
     """External API Configuration Settings"""
     DHAN_ACCESS_TOKEN: str = os.getenv("DHAN_ACCESS_TOKEN", "")
     DHAN_CLIENT_ID: str = os.getenv("DHAN_CLIENT_ID", "")
+    DHAN_SECTOR_BATCH_SIZE: int = os.getenv("DHAN_SECTOR_BATCH_SIZE", 100)
+    DHAN_SECTOR_CACHE_TTL_DAYS: int = os.getenv("DHAN_SECTOR_CACHE_TTL_DAYS", 7)
     KITE_API_KEY: str = os.getenv("KITE_API_KEY", "")
 
 
@@ -3,7 +3,7 @@
 Securities domain models for Quantpulse application.
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, UniqueConstraint, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, UniqueConstraint, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -72,7 +72,11 @@ class Security(BaseModel):
     Security model representing tradeable financial instruments.
     """
     __tablename__ = "securities"
-    __table_args__ = (UniqueConstraint("symbol", "exchange_id", name="uq_symbol_exchange"), )
+    __table_args__ = (
+        UniqueConstraint("symbol", "exchange_id", name="uq_symbol_exchange"),
+        # Partial index covering the OHLCV import's candidate set
+        Index("idx_securities_importable_type", "security_type", postgresql_where=text("is_active AND is_tradeable AND NOT is_deleted")),
+    )
 
     # Basic information
     symbol = Column(String(100), nullable=False, index=True)
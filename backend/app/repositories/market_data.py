@@ -4,19 +4,30 @@ Data access layer for market data operations.
 Handles all database interactions for OHLCV data and technical indicators.
 """
 
-from typing import Optional, List, Dict, Any
+import csv
+import io
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc
+from sqlalchemy import func, desc, asc, insert, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import date, datetime, timedelta
 
 from app.repositories.base import BaseRepository
 from app.models.market_data import OHLCVData, TechnicalIndicator, MarketDataImportLog
+from app.models.securities import Security
+from app.core.exceptions import DatabaseError
 from app.utils.logger import get_logger
 from app.utils.enum import Timeframe
 
 logger = get_logger(__name__)
 
+# Columns written by the OHLCV bulk upsert, in COPY order
+OHLCV_UPSERT_COLUMNS = ('security_id', 'date', 'timeframe', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+
+# Below this many rows a plain INSERT ... ON CONFLICT is cheaper than staging through COPY
+OHLCV_COPY_THRESHOLD = 1024
+
 
 class OHLCVRepository(BaseRepository[OHLCVData]):
     """Repository for OHLCV data operations"""
@@ -85,10 +96,96 @@ class OHLCVRepository(BaseRepository[OHLCVData]):
 
         return stats
 
+    def bulk_upsert_ohlcv(self, ohlcv_rows: List[Tuple], synchronous_commit: bool = True) -> Dict[UUID, Dict[str, int]]:
+        """
+        Insert or update OHLCV rows with a single statement.
+        Large batches are streamed into a temp table with COPY and merged with one INSERT ... ON CONFLICT.
+        Args:
+            ohlcv_rows: Tuples ordered as OHLCV_UPSERT_COLUMNS
+            synchronous_commit: Set False for re-fetchable bulk loads; a server crash may then lose the
+                last few commits, which an idempotent re-run of the import restores
+        Returns:
+            Created and updated counts per security ID
+        """
+        stats = {}
+
+        # ON CONFLICT cannot touch the same row twice in one statement, so keep the last row per key
+        rows = {row[:3]: row for row in ohlcv_rows}
+
+        if not rows:
+            return stats
+
+        try:
+            if not synchronous_commit:
+                # Scoped to this transaction; skips waiting for the WAL flush on commit
+                self.db.execute(text("SET LOCAL synchronous_commit = OFF"))
+
+            if len(rows) < OHLCV_COPY_THRESHOLD:
+                upserted = self._insert_on_conflict([dict(zip(OHLCV_UPSERT_COLUMNS, row)) for row in rows.values()])
+            else:
+                upserted = self._copy_upsert(rows.values())
+
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error bulk upserting {len(rows)} OHLCV records: {e}")
+            raise DatabaseError("bulk_upsert_ohlcv", str(e))
+
+        for security_id, inserted in upserted:
+            security_stats = stats.setdefault(security_id, {'created': 0, 'updated': 0})
+            security_stats['created' if inserted else 'updated'] += 1
+
+        return stats
+
+    def _insert_on_conflict(self, rows: List[Dict[str, Any]]) -> List[Tuple[UUID, bool]]:
+        """Upsert rows through SQLAlchemy Core, returning (security_id, inserted) per row"""
+        stmt = pg_insert(OHLCVData).values(rows)
+        stmt = stmt.on_conflict_do_update(constraint="uq_ohlcv_security_date_timeframe",
+                                          set_={
+                                              'open_price': stmt.excluded.open_price,
+                                              'high_price': stmt.excluded.high_price,
+                                              'low_price': stmt.excluded.low_price,
+                                              'close_price': stmt.excluded.close_price,
+                                              'volume': stmt.excluded.volume,
+                                              'updated_at': func.now(),
+                                              'is_deleted': False,
+                                              'deleted_at': None,
+                                          })
+        # xmax is zero only for freshly inserted tuples
+        stmt = stmt.returning(OHLCVData.security_id, literal_column("(xmax = 0)").label("inserted"))
+        return [(row.security_id, row.inserted) for row in self.db.execute(stmt)]
+
+    def _copy_upsert(self, rows) -> List[Tuple[UUID, bool]]:
+        """Stream rows into a temp table with COPY and merge them in one statement"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        columns = ", ".join(OHLCV_UPSERT_COLUMNS)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.execute("CREATE TEMP TABLE tmp_ohlcv_data (security_id uuid, date date, timeframe varchar(10), open_price numeric(18, 4), high_price numeric(18, 4), low_price numeric(18, 4), close_price numeric(18, 4), volume numeric(20, 0)) ON COMMIT DROP")
+            cursor.copy_expert(f"COPY tmp_ohlcv_data ({columns}) FROM STDIN WITH (FORMAT CSV)", buffer)
+            cursor.execute(f"""
+                INSERT INTO ohlcv_data (id, {columns}, is_deleted)
+                SELECT gen_random_uuid(), {columns}, false FROM tmp_ohlcv_data
+                ON CONFLICT ON CONSTRAINT uq_ohlcv_security_date_timeframe DO UPDATE SET
+                    open_price = EXCLUDED.open_price,
+                    high_price = EXCLUDED.high_price,
+                    low_price = EXCLUDED.low_price,
+                    close_price = EXCLUDED.close_price,
+                    volume = EXCLUDED.volume,
+                    updated_at = now(),
+                    is_deleted = false,
+                    deleted_at = NULL
+                RETURNING security_id, (xmax = 0)
+            """)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
     def get_securities_missing_data(self, date_from: date, date_to: date, security_ids: Optional[List[UUID]] = None, timeframe: str = Timeframe.DAILY.value) -> List[UUID]:
         """Get list of security IDs that are missing OHLCV data for the date range"""
-        from app.models.securities import Security
-
         # Build base query for active securities
         securities_query = self.db.query(Security.id).filter(Security.is_active == True, Security.is_deleted == False)
 
@@ -100,7 +197,7 @@ class OHLCVRepository(BaseRepository[OHLCVData]):
         # Get security IDs that have data in the date range
         securities_with_data = self.db.query(OHLCVData.security_id.distinct()).filter(OHLCVData.date >= date_from, OHLCVData.date <= date_to, OHLCVData.timeframe == timeframe, OHLCVData.is_deleted == False).all()
 
-        securities_with_data_ids = [row[0] for row in securities_with_data]
+        securities_with_data_ids = {row[0] for row in securities_with_data}
 
         # Return securities that don't have data
         missing_security_ids = [sid for sid in all_security_ids if sid not in securities_with_data_ids]
@@ -210,6 +307,21 @@ class MarketDataImportLogRepository(BaseRepository[MarketDataImportLog]):
         log_entry = MarketDataImportLog(**import_data)
         return self.create(log_entry)
 
+    def bulk_create_import_logs(self, logs_data: List[Dict[str, Any]]) -> int:
+        """Create import log entries with one batched INSERT"""
+        if not logs_data:
+            return 0
+
+        try:
+            self.db.execute(insert(MarketDataImportLog), logs_data)
+            self.db.commit()
+            logger.info(f"Created {len(logs_data)} MarketDataImportLog instances")
+            return len(logs_data)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error bulk creating MarketDataImportLog: {e}")
+            raise DatabaseError("bulk_create_import_logs", str(e))
+
     def get_latest_import_for_security(self, security_id: UUID, import_type: str = None) -> Optional[MarketDataImportLog]:
         """Get the latest import log for a security"""
         query = self.db.query(MarketDataImportLog).filter(MarketDataImportLog.security_id == security_id, MarketDataImportLog.is_deleted == False)
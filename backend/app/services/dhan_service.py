@@ -4,21 +4,131 @@ Service to handle Dhan related operations from Securities Import to OHLCV Import
 Updated to work with actual Dhan CSV structure.
 """
 
+import asyncio
+import io
+import json
+import numpy as np
 import pandas as pd
+import httpx
+import redis
 import requests
-from datetime import datetime, date, time, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dhanhq import dhanhq
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from app.utils.logger import get_logger
+from app.utils.redis_client import get_redis_client
+from app.utils.rate_limiter import RedisTokenBucketRateLimiter
 from app.core.config import settings
 from app.core.exceptions import ExternalAPIError, ValidationError
 from app.utils.enum import SecurityType, SettlementType, SecuritySegment, ExpiryMonth
 
 logger = get_logger(__name__)
 
+# Dhan data API request budget, shared through Redis by every worker process using the same credentials
+DHAN_DATA_REQUESTS_PER_SECOND = 5
+DHAN_DATA_RATE_LIMIT_KEY = "rate_limit:dhan:data"
+
+SECURITIES_MASTER_URL = "https://images.dhan.co/api-data/api-scrip-master-detailed.csv"
+SECTOR_INFO_URL = "https://ow-scanx-analytics.dhan.co/customscan/fetchdt"
+
+# Sector scan request budget, shared through Redis by every enrichment run in every worker process
+SECTOR_INFO_REQUESTS_PER_SECOND = 5
+SECTOR_INFO_RATE_LIMIT_KEY = "rate_limit:dhan:sector_info"
+
+# Ceiling on sector requests in flight. The SECTOR_INFO_REQUESTS_PER_SECOND budget on the Dhan side is the real
+# throughput limit, not client CPU; more concurrency only hides round-trip latency.
+SECTOR_INFO_MAX_CONCURRENCY = 32
+
+# Transient sector scan failures are retried with exponential backoff (0.5s, 1s, 2s); httpx's transport only retries connection errors
+SECTOR_INFO_RETRY_STATUSES = (429, 500, 502, 503, 504)
+SECTOR_INFO_MAX_RETRIES = 3
+SECTOR_INFO_RETRY_BACKOFF_SECONDS = 0.5
+
+# Sector scan batches the endpoint rejects as too large are split in half and retried. A 400 only counts when
+# its body says the request was too large; other 400s (bad payload, auth) fail the batch without splitting.
+SECTOR_INFO_OVERSIZE_STATUSES = (413, 414)
+SECTOR_INFO_OVERSIZE_MESSAGES = ("too long", "too large", "too many")
+
+# Dhan historical data (exchange_segment, instrument_type) per security type
+OHLCV_SEGMENTS_BY_SECURITY_TYPE = {
+    SecurityType.EQUITY.value: ("NSE_EQ", "EQUITY"),
+    SecurityType.INDEX.value: ("IDX_I", "INDEX"),
+    SecurityType.FUTIDX.value: ("NSE_FNO", "FUTIDX"),
+    SecurityType.FUTSTK.value: ("NSE_FNO", "FUTSTK"),
+    SecurityType.OPTIDX.value: ("NSE_FNO", "OPTIDX"),
+    SecurityType.OPTSTK.value: ("NSE_FNO", "OPTSTK"),
+    SecurityType.FUTCUR.value: ("NSE_CURRENCY", "FUTCUR"),
+    SecurityType.OPTCUR.value: ("NSE_CURRENCY", "OPTCUR"),
+    SecurityType.FUTCOM.value: ("MCX_COMM", "FUTCOM"),
+    SecurityType.OPTCOM.value: ("MCX_COMM", "OPTFUT"),
+}
+
+# Detailed securities master columns read by the filter, validation and processing steps
+SECURITIES_MASTER_COLUMNS = [
+    "SECURITY_ID", "EXCH_ID", "SEGMENT", "INSTRUMENT", "INSTRUMENT_TYPE", "UNDERLYING_SECURITY_ID", "UNDERLYING_SYMBOL", "SYMBOL_NAME", "DISPLAY_NAME", "ISIN", "LOT_SIZE", "TICK_SIZE",
+    "SM_EXPIRY_DATE", "STRIKE_PRICE", "OPTION_TYPE"
+]
+
+# Securities master rows kept by filter_securities_and_futures
+RELEVANT_SEGMENTS = ["D", "E", "I"]
+RELEVANT_INSTRUMENTS = ["EQUITY", "INDEX", "FUTSTK", "FUTIDX"]
+RELEVANT_INSTRUMENT_TYPES = ["ES", "INDEX", "FUT", "FUTIDX", "FUTSTK"]
+CATEGORICAL_COLUMNS = ("EXCH_ID", "SEGMENT", "INSTRUMENT", "INSTRUMENT_TYPE")
+
+# Dhan INSTRUMENT to SecurityType; anything unlisted is treated as equity
+INSTRUMENT_SECURITY_TYPES = {
+    "EQUITY": SecurityType.EQUITY.value,
+    "INDEX": SecurityType.INDEX.value,
+    "FUTSTK": SecurityType.FUTSTK.value,
+    "FUTIDX": SecurityType.FUTIDX.value,
+    "FUTCOM": SecurityType.FUTCOM.value,
+    "FUTCUR": SecurityType.FUTCUR.value,
+    "OPTSTK": SecurityType.OPTSTK.value,
+    "OPTIDX": SecurityType.OPTIDX.value,
+    "OPTFUT": SecurityType.OPTCOM.value,
+    "OPTCUR": SecurityType.OPTCUR.value,
+}
+
+# Dhan SEGMENT to our segment classification; anything unlisted is treated as equity
+SEGMENT_MAPPING = {
+    "E": SecuritySegment.EQUITY.value,
+    "D": SecuritySegment.DERIVATIVE.value,
+    "C": SecuritySegment.CURRENCY.value,
+    "M": SecuritySegment.COMMODITY.value,
+    "I": SecuritySegment.INDEX.value,
+}
+
+DERIVATIVE_SECURITY_TYPES = frozenset({
+    SecurityType.FUTSTK.value, SecurityType.FUTIDX.value, SecurityType.FUTCOM.value, SecurityType.FUTCUR.value,
+    SecurityType.OPTSTK.value, SecurityType.OPTIDX.value, SecurityType.OPTCOM.value, SecurityType.OPTCUR.value,
+})
+
+FUTURE_INSTRUMENTS = frozenset({"FUTSTK", "FUTIDX", "FUTCOM", "FUTCUR"})
+OPTION_INSTRUMENTS = frozenset({"OPTSTK", "OPTIDX", "OPTFUT", "OPTCUR"})
+
+# Index derivatives settle in cash, everything else physically
+CASH_SETTLED_INSTRUMENTS = frozenset({"FUTIDX", "OPTIDX"})
+
+# Date formats seen in SM_EXPIRY_DATE, tried in order
+EXPIRY_DATE_FORMATS = (
+    "%Y-%m-%d",  # 2024-08-28
+    "%d-%m-%Y",  # 30-09-2025
+    "%Y/%m/%d",  # 2024/08/28
+    "%d/%m/%Y",  # 30/09/2025
+)
+
+# Expiry month number to contract month code
+CONTRACT_MONTHS = {number: month.value for number, month in enumerate(ExpiryMonth, start=1)}
+
+SECURITY_REQUIRED_FIELDS = ("SECURITY_ID", "UNDERLYING_SYMBOL", "EXCH_ID", "INSTRUMENT")
+
+# Sector data rarely changes: sector info is cached in Redis per (exchange, ISIN) across runs and workers
+SECTOR_INFO_CACHE_KEY_PREFIX = "sector_info"
+
 
 class DhanService:
     """Service to perform all operations related to Dhan"""
@@ -29,13 +139,35 @@ class DhanService:
             raise ValidationError("Dhan API credentials not configured", details={"missing_fields": ["DHAN_CLIENT_ID", "DHAN_ACCESS_TOKEN"]})
 
         try:
-            self.dhan_context = dhanhq(settings.external.DHAN_CLIENT_ID, settings.external.DHAN_ACCESS_TOKEN)
-            self._lock = threading.Lock()
+            # The dhanhq client is built on first API call, so pandas-only uses of the service never pay for it
+            self._dhan_context = None
+            self._dhan_context_lock = threading.Lock()
+            self._ohlcv_rate_limiter = RedisTokenBucketRateLimiter(settings.celery.REDIS_URL, DHAN_DATA_RATE_LIMIT_KEY, DHAN_DATA_REQUESTS_PER_SECOND)
+            self._sector_rate_limiter = RedisTokenBucketRateLimiter(settings.celery.REDIS_URL, SECTOR_INFO_RATE_LIMIT_KEY, SECTOR_INFO_REQUESTS_PER_SECOND)
+            self._redis = get_redis_client(settings.celery.REDIS_URL)
+            # Largest sector scan batch the endpoint accepted per exchange after rejecting a larger one; later batches start at it
+            self._sector_batch_limits = {}
+
+            # Pooled keep-alive HTTP session so sector enrichment batches reuse TCP/TLS connections.
+            # The scan endpoint's POST is a read-only query, so transient failures are retried with backoff.
+            self._http = requests.Session()
+            self._http.headers.update({"Connection": "keep-alive", "Content-Type": "application/json"})
+            retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "POST"])
+            self._http.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries))
             logger.info("Dhan service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Dhan service: {e}")
             raise ExternalAPIError("Dhan", f"Initialization failed: {str(e)}")
 
+    @property
+    def dhan_context(self) -> dhanhq:
+        """dhanhq client, created on first use"""
+        if self._dhan_context is None:
+            with self._dhan_context_lock:
+                if self._dhan_context is None:
+                    self._dhan_context = dhanhq(settings.external.DHAN_CLIENT_ID, settings.external.DHAN_ACCESS_TOKEN)
+        return self._dhan_context
+
     def test_connection(self) -> Dict[str, Any]:
         """Test Dhan API connection"""
         try:
@@ -47,16 +179,21 @@ class DhanService:
             raise ExternalAPIError("Dhan", f"Connection test failed: {str(e)}")
 
     def download_securities_master_detailed(self) -> pd.DataFrame:
-        """Download detailed securities master using dhanhq library"""
+        """Download the detailed securities master CSV (the file dhanhq's fetch_security_list reads)"""
         try:
-            logger.info("Downloading securities data using dhanhq library")
-            raw_data = self.dhan_context.fetch_security_list(mode="detailed")
+            logger.info(f"Downloading securities master from {SECURITIES_MASTER_URL}")
+            response = self._http.get(SECURITIES_MASTER_URL, timeout=120)
+            response.raise_for_status()
 
-            if raw_data is None or len(raw_data) == 0:
+            if not response.content:
+                raise ExternalAPIError("Dhan", "No data received from securities master API")
+
+            # Parse straight from memory, reading only the columns the pipeline uses;
+            # the low-cardinality filter columns are parsed as categoricals so isin compares integer codes
+            df = pd.read_csv(io.BytesIO(response.content), usecols=lambda column: column in SECURITIES_MASTER_COLUMNS, dtype={column: "category" for column in CATEGORICAL_COLUMNS}, low_memory=False)
+            if df.empty:
                 raise ExternalAPIError("Dhan", "No data received from securities master API")
 
-            # Convert to DataFrame
-            df = pd.DataFrame(raw_data)
             logger.info(f"Downloaded {len(df)} total records from Dhan API")
 
             return df
@@ -70,147 +207,110 @@ class DhanService:
         logger.info(f"Filtering {len(df)} total records for exchanges: {supported_exchanges}")
 
         # Filter for supported exchanges
-        filtered_df = df[df["EXCH_ID"].isin(supported_exchanges)]
+        exchange_mask = df["EXCH_ID"].isin(supported_exchanges)
+        exchange_count = int(exchange_mask.sum())
 
-        if len(filtered_df) == 0:
+        if exchange_count == 0:
             logger.warning(f"No securities found for supported exchanges: {supported_exchanges}")
             return pd.DataFrame()
 
-        # Filter for relevant instrument types
-        relevant_segments = ["D", "E", "I"]
-        relevant_instruments = ["EQUITY", "INDEX", "FUTSTK", "FUTIDX"]
-        relevant_instrument_types = ["ES", "INDEX", "FUT", "FUTIDX", "FUTSTK"]
-
-        filtered_df = filtered_df[filtered_df["SEGMENT"].isin(relevant_segments)]
-        filtered_df = filtered_df[filtered_df["INSTRUMENT"].isin(relevant_instruments)]
-        final_df = filtered_df[filtered_df["INSTRUMENT_TYPE"].isin(relevant_instrument_types)]
+        # Filter for relevant instrument types in the same pass, slicing the frame once
+        mask = exchange_mask & df["SEGMENT"].isin(RELEVANT_SEGMENTS) & df["INSTRUMENT"].isin(RELEVANT_INSTRUMENTS) & df["INSTRUMENT_TYPE"].isin(RELEVANT_INSTRUMENT_TYPES)
+        final_df = df.loc[mask]
 
-        logger.info(f"Filtered {len(final_df)} records from {len(filtered_df)} exchange records using instrument types: {relevant_instruments}")
+        logger.info(f"Filtered {len(final_df)} records from {exchange_count} exchange records using instrument types: {RELEVANT_INSTRUMENTS}")
         return final_df
 
     def validate_and_clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Validate and clean securities data"""
-        valid_securities = []
-
-        for index, row in df.iterrows():
-            if self._validate_security_row(row):
-                valid_securities.append(row)
-
-        clean_df = pd.DataFrame(valid_securities)
+        clean_df = df[self._valid_securities_mask(df)]
         logger.info(f"Validation complete: {len(clean_df)} valid securities from {len(df)} records")
         return clean_df
 
-    def process_securities_data(self, securities_df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Process securities DataFrame into standardized format for database insertion"""
-
-        # First pass: Build derivatives mapping
-        derivatives_map = self._build_derivatives_mapping(securities_df)
-
-        processed_securities = []
-
-        for index, row in securities_df.iterrows():
-            try:
-                # Validate row first
-                if not self._validate_security_row(row):
-                    continue
-
-                # Map instrument type to SecurityType enum
-                security_type = self._map_security_type(row)
+    def process_securities_data(self, securities_df: pd.DataFrame, validated: bool = False) -> List[Dict[str, Any]]:
+        """Process securities DataFrame into standardized format for database insertion; pass validated=True for output of validate_and_clean_data"""
 
-                # Use SYMBOL_NAME for derivatives, UNDERLYING_SYMBOL for equities/indices
-                if self._is_derivative(security_type):
-                    symbol = self._safe_strip(row.get("SYMBOL_NAME"))
-                    underlying_symbol = self._safe_strip(row.get("UNDERLYING_SYMBOL"))
-                else:
-                    symbol = self._safe_strip(row.get("UNDERLYING_SYMBOL"))
-                    underlying_symbol = symbol
-
-                security_data = {
-                    'symbol': symbol,
-                    'name': self._safe_strip(row.get("DISPLAY_NAME")),
-                    'external_id': int(row["SECURITY_ID"]),
-                    'exchange_code': self._safe_strip(row.get("EXCH_ID")),
-                    'security_type': security_type,
-                    'segment': self._map_segment(row),
-                    'isin': self._safe_strip(row.get("ISIN")) if row.get("ISIN") not in ["NA", "null", None] else None,
-                    'sector': None,  # Will be enriched later
-                    'industry': None,  # Will be enriched later
-                    'lot_size': self._safe_int(row.get("LOT_SIZE"), 1),
-                    'tick_size': str(row.get("TICK_SIZE", "0.05")),
-                    'is_active': True,
-                    'is_tradeable': True,
-                }
+        # Normalize the key columns once; the mapping and every per-row field below reuse them
+        instrument = self._strip_column(securities_df, "INSTRUMENT").str.upper()
+        underlying_symbol = self._strip_column(securities_df, "UNDERLYING_SYMBOL")
 
-                # Set derivative flags based on security type
-                if self._is_derivative(security_type):
-                    # Derivatives themselves don't have derivative flags
-                    security_data.update({
-                        'is_derivatives_eligible': False,
-                        'has_options': False,
-                        'has_futures': False,
-                    })
-                else:
-                    # Only underlying securities get derivative flags from the mapping
-                    derivative_flags = derivatives_map.get(underlying_symbol, {'has_futures': False, 'has_options': False, 'is_derivatives_eligible': False})
-                    security_data.update(derivative_flags)
-
-                # Add derivative-specific fields if it's a derivative
-                if self._is_derivative(security_type):
-                    derivative_data = self._extract_derivative_data(row)
-                    security_data.update(derivative_data)
-
-                processed_securities.append(security_data)
+        # First pass: Build derivatives mapping
+        derivatives_map = self._build_derivatives_mapping(underlying_symbol, instrument)
 
-            except Exception as e:
-                logger.warning(f"Error processing security {row.get('UNDERLYING_SYMBOL', 'unknown')}: {e}")
-                continue
+        if validated:
+            df = securities_df
+        else:
+            valid = self._valid_securities_mask(securities_df)
+            df, instrument, underlying_symbol = securities_df[valid], instrument[valid], underlying_symbol[valid]
+        if df.empty:
+            logger.info(f"Processed 0 securities from {len(securities_df)} records")
+            return []
+
+        # Map instrument type to SecurityType enum
+        security_type = instrument.map(INSTRUMENT_SECURITY_TYPES).fillna(SecurityType.EQUITY.value)
+        is_derivative = security_type.isin(DERIVATIVE_SECURITY_TYPES)
+
+        # Use SYMBOL_NAME for derivatives, UNDERLYING_SYMBOL for equities/indices
+        isin = self._strip_column(df, "ISIN")
+
+        processed_df = pd.DataFrame(
+            {
+                'symbol': self._strip_column(df, "SYMBOL_NAME").where(is_derivative, underlying_symbol),
+                'name': self._strip_column(df, "DISPLAY_NAME"),
+                'external_id': pd.to_numeric(df["SECURITY_ID"]).astype("int64"),
+                'exchange_code': self._strip_column(df, "EXCH_ID"),
+                'security_type': security_type,
+                'segment': self._column(df, "SEGMENT", "").astype(str).str.upper().map(SEGMENT_MAPPING).fillna(SecuritySegment.EQUITY.value),
+                'isin': isin.astype(object).where(isin.ne(""), None),
+                'sector': None,  # Will be enriched later
+                'industry': None,  # Will be enriched later
+                'lot_size': pd.to_numeric(self._column(df, "LOT_SIZE"), errors="coerce").fillna(1).astype("int64"),
+                'tick_size': self._column(df, "TICK_SIZE", "0.05").astype(str),
+                'is_active': True,
+                'is_tradeable': True,
+            },
+            index=df.index)
+
+        # Only underlying securities get derivative flags from the mapping; derivatives themselves don't have them
+        derivative_flags = derivatives_map.reindex(underlying_symbol.to_numpy(), fill_value=False)
+        derivative_flags.index = df.index
+        derivative_flags.loc[is_derivative] = False
+        processed_df = processed_df.join(derivative_flags)
+
+        # Underlyings first, then derivatives with their specific fields joined on as columns
+        processed_securities = processed_df[~is_derivative].to_dict(orient="records")
+        if is_derivative.any():
+            derivatives_df, derivative_instrument = df[is_derivative], instrument[is_derivative]
+            derivative_df = processed_df[is_derivative].join(self._extract_derivative_data(derivatives_df, derivative_instrument))
+
+            is_option = derivative_instrument.str.startswith("OPT")
+            processed_securities.extend(derivative_df[~is_option].to_dict(orient="records"))
+            if is_option.any():
+                processed_securities.extend(derivative_df[is_option].join(self._extract_option_data(derivatives_df[is_option])).to_dict(orient="records"))
 
         logger.info(f"Processed {len(processed_securities)} securities from {len(securities_df)} records")
         return processed_securities
 
-    def _build_derivatives_mapping(self, securities_df: pd.DataFrame) -> Dict[str, Dict[str, bool]]:
-        """Build mapping of which underlyings have futures/options"""
-        derivatives_map = {}
-
-        for index, row in securities_df.iterrows():
-            try:
-                instrument = row.get("INSTRUMENT", "").upper()
-                underlying_symbol = self._safe_strip(row.get("UNDERLYING_SYMBOL"))
-
-                if not underlying_symbol:
-                    continue
-
-                # Initialize if not exists
-                if underlying_symbol not in derivatives_map:
-                    derivatives_map[underlying_symbol] = {'has_futures': False, 'has_options': False, 'is_derivatives_eligible': False}
+    def _build_derivatives_mapping(self, underlying_symbol: pd.Series, instrument: pd.Series) -> pd.DataFrame:
+        """Build mapping of which underlyings have futures/options, as flag columns indexed by underlying symbol"""
+        flags = pd.DataFrame({'has_futures': instrument.isin(FUTURE_INSTRUMENTS), 'has_options': instrument.isin(OPTION_INSTRUMENTS)})
 
-                # Check for futures
-                if instrument in ["FUTSTK", "FUTIDX", "FUTCOM", "FUTCUR"]:
-                    derivatives_map[underlying_symbol]['has_futures'] = True
-
-                # Check for options
-                if instrument in ["OPTSTK", "OPTIDX", "OPTFUT", "OPTCUR"]:
-                    derivatives_map[underlying_symbol]['has_options'] = True
-
-            except Exception as e:
-                logger.debug(f"Error processing derivatives mapping for row: {e}")
-                continue
+        has_underlying = underlying_symbol.ne("")
+        derivatives_map = flags[has_underlying].groupby(underlying_symbol[has_underlying], sort=False).any()
 
         # Set is_derivatives_eligible based on whether security has futures OR options
-        for underlying_symbol, flags in derivatives_map.items():
-            flags['is_derivatives_eligible'] = flags['has_futures'] or flags['has_options']
-
-        eligible_count = sum(1 for flags in derivatives_map.values() if flags['is_derivatives_eligible'])
-        futures_count = sum(1 for flags in derivatives_map.values() if flags['has_futures'])
-        options_count = sum(1 for flags in derivatives_map.values() if flags['has_options'])
+        derivatives_map['is_derivatives_eligible'] = derivatives_map['has_futures'] | derivatives_map['has_options']
 
+        eligible_count, futures_count, options_count = (int(derivatives_map[flag].sum()) for flag in ('is_derivatives_eligible', 'has_futures', 'has_options'))
         logger.info(f"Derivatives mapping: {eligible_count} derivatives-eligible, {futures_count} with futures, {options_count} with options")
 
         return derivatives_map
 
-    def enrich_securities_with_sector_info(self, securities_data: List[Dict[str, Any]], batch_size: int = 15, max_workers: int = 3) -> List[Dict[str, Any]]:
-        """Enrich securities data with sector and industry information using parallel processing"""
-        logger.info(f"Enriching {len(securities_data)} securities with sector information using {max_workers} workers")
+    def enrich_securities_with_sector_info(self, securities_data: List[Dict[str, Any]], batch_size: int = None, max_workers: int = None, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Enrich securities data with sector and industry information, with up to max_workers requests in flight (by default scaled to the number of exchanges).
+        With force_refresh, cached sector info is ignored and every ISIN is fetched again (fresh results are still cached)."""
+        batch_size = batch_size or int(settings.external.DHAN_SECTOR_BATCH_SIZE)
+        logger.info(f"Enriching {len(securities_data)} securities with sector information")
 
         # Filter securities that have ISIN and are EQUITY type
         securities_with_isin = [sec for sec in securities_data if sec.get('isin') and sec.get('security_type') == SecurityType.EQUITY.value]
@@ -221,48 +321,31 @@ class DhanService:
 
         logger.info(f"Found {len(securities_with_isin)} equity securities with ISIN for enrichment")
 
-        # Group securities by exchange for parallel processing
+        # Group securities by exchange, as each sector info request covers a single exchange
         securities_by_exchange = {}
         for sec in securities_with_isin:
-            exchange_code = sec.get('exchange_code', 'NSE')
-            if exchange_code not in securities_by_exchange:
-                securities_by_exchange[exchange_code] = []
-            securities_by_exchange[exchange_code].append(sec)
-
-        # Process each exchange in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_exchange = {}
-            for exchange_code, exchange_securities in securities_by_exchange.items():
-                future = executor.submit(self._enrich_exchange_securities, exchange_code, exchange_securities, batch_size)
-                future_to_exchange[future] = exchange_code
+            securities_by_exchange.setdefault(sec.get('exchange_code', 'NSE'), []).append(sec)
 
-            # Collect results from all exchanges
-            for future in as_completed(future_to_exchange):
-                exchange_code = future_to_exchange[future]
-                try:
-                    future.result()  # This modifies securities in place
-                    logger.info(f"Completed sector enrichment for {exchange_code}")
-                except Exception as e:
-                    logger.warning(f"Error enriching exchange {exchange_code}: {e}")
+        # Requests are I/O-bound, so concurrency scales with the exchanges being fetched
+        max_workers = max_workers or min(SECTOR_INFO_MAX_CONCURRENCY, max(4, len(securities_by_exchange) * 4))
+        logger.info(f"Fetching sector info for {len(securities_by_exchange)} exchanges using {max_workers} concurrent requests")
 
-        # Add back securities without ISIN (unchanged)
-        securities_without_isin = [sec for sec in securities_data if not sec.get('isin') or sec.get('security_type') != SecurityType.EQUITY.value]
-        enriched_securities = securities_with_isin + securities_without_isin
+        # Fetch every (exchange, batch) pair concurrently on one event loop
+        asyncio.run(self._enrich_securities_async(securities_by_exchange, batch_size, max_workers, use_cache=not force_refresh))
 
-        enriched_count = sum(1 for sec in enriched_securities if sec.get('sector'))
+        # Securities were enriched in place, so the input list is the result, in the caller's order
+        enriched_count = sum(1 for sec in securities_with_isin if sec.get('sector'))
         logger.info(f"Successfully enriched {enriched_count}/{len(securities_data)} securities with sector information")
 
-        return enriched_securities
+        return securities_data
 
     def fetch_sector_info(self, symbol: str = None, batch_symbols: List[str] = None, exchange_code: str = "NSE") -> Dict[str, Any]:
         """Fetch sector and industry information for symbols (bulk request)"""
         try:
-            url = "https://ow-scanx-analytics.dhan.co/customscan/fetchdt"
-
             if batch_symbols:
-                return self._fetch_sector_info_bulk(url, batch_symbols, exchange_code)
+                return self._fetch_sector_info_bulk(SECTOR_INFO_URL, batch_symbols, exchange_code)
             elif symbol:
-                return self._fetch_sector_info_bulk(url, [symbol], exchange_code)
+                return self._fetch_sector_info_bulk(SECTOR_INFO_URL, [symbol], exchange_code)
             else:
                 raise ValidationError("No symbols provided for sector info fetch")
         except Exception as e:
@@ -274,236 +357,263 @@ class DhanService:
         stats = {'total_securities': len(df), 'securities_by_exchange': {}, 'securities_by_segment': {}, 'securities_by_instrument': {}}
 
         if len(df) > 0:
-            stats['securities_by_exchange'] = df['EXCH_ID'].value_counts().to_dict()
-            stats['securities_by_segment'] = df['SEGMENT'].value_counts().to_dict()
-            stats['securities_by_instrument'] = df['INSTRUMENT'].value_counts().to_dict()
+            # Tabulate all three columns in one grouping pass, then sum each breakdown out of it;
+            # observed=True leaves out categories with no rows
+            counts = df.groupby(['EXCH_ID', 'SEGMENT', 'INSTRUMENT'], observed=True, dropna=False).size()
+            for stat, column in (('securities_by_exchange', 'EXCH_ID'), ('securities_by_segment', 'SEGMENT'), ('securities_by_instrument', 'INSTRUMENT')):
+                stats[stat] = counts.groupby(level=column, observed=True).sum().to_dict()
 
         return stats
 
     # Private helper methods
-    def _validate_security_row(self, row: Dict) -> bool:
-        """Validate required fields for security"""
-        required_fields = ["SECURITY_ID", "UNDERLYING_SYMBOL", "EXCH_ID", "INSTRUMENT"]
-
-        for field in required_fields:
-            if not row.get(field) or pd.isna(row.get(field)):
-                return False
-
-        try:
-            int(row["SECURITY_ID"])
-        except (ValueError, TypeError):
-            return False
-
-        return True
-
-    def _safe_strip(self, value, default: str = "") -> str:
-        """Safely strip string values, handle floats and NaN"""
-        try:
-            if pd.isna(value) or value in ["NA", "null"]:
-                return default
-            return str(value).strip()
-        except (AttributeError, TypeError):
-            return default
-
-    def _safe_int(self, value, default: int = 1) -> int:
-        """Safely convert value to integer"""
-        try:
-            if pd.isna(value) or value in ["NA", "null"]:
-                return default
-            return int(float(value))
-        except (ValueError, TypeError):
-            return default
-
-    def _map_security_type(self, row: Dict) -> str:
-        """Map Dhan instrument to SecurityType enum"""
-        instrument = row.get("INSTRUMENT", "").upper()
-
-        # Map to SecurityType enum values
-        instrument_mapping = {
-            "EQUITY": SecurityType.EQUITY.value,
-            "INDEX": SecurityType.INDEX.value,
-            "FUTSTK": SecurityType.FUTSTK.value,
-            "FUTIDX": SecurityType.FUTIDX.value,
-            "FUTCOM": SecurityType.FUTCOM.value,
-            "FUTCUR": SecurityType.FUTCUR.value,
-            "OPTSTK": SecurityType.OPTSTK.value,
-            "OPTIDX": SecurityType.OPTIDX.value,
-            "OPTFUT": SecurityType.OPTCOM.value,
-            "OPTCUR": SecurityType.OPTCUR.value,
-        }
-
-        return instrument_mapping.get(instrument, SecurityType.EQUITY.value)
-
-    def _map_segment(self, row: Dict) -> str:
-        """Map Dhan segment to our segment classification"""
-        segment = row.get("SEGMENT", "").upper()
-
-        segment_mapping = {
-            "E": SecuritySegment.EQUITY.value,
-            "D": SecuritySegment.DERIVATIVE.value,
-            "C": SecuritySegment.CURRENCY.value,
-            "M": SecuritySegment.COMMODITY.value,
-            "I": SecuritySegment.INDEX.value,
-        }
-
-        return segment_mapping.get(segment, SecuritySegment.EQUITY.value)
-
-    def _is_derivative(self, security_type: str) -> bool:
-        """Check if security type is a derivative"""
-        derivative_types = [SecurityType.FUTSTK.value, SecurityType.FUTIDX.value, SecurityType.FUTCOM.value, SecurityType.FUTCUR.value, SecurityType.OPTSTK.value, SecurityType.OPTIDX.value, SecurityType.OPTCOM.value, SecurityType.OPTCUR.value]
-        return security_type in derivative_types
-
-    def _extract_derivative_data(self, row: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract derivative-specific data for futures and options"""
-        derivative_data = {}
-
+    def _column(self, df: pd.DataFrame, column: str, default=None) -> pd.Series:
+        """Get a column, or a Series of the default when the column is absent"""
+        if column in df.columns:
+            return df[column]
+        return pd.Series(default, index=df.index, dtype=object)
+
+    def _strip_column(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """Stripped strings, with NaN, "NA" and "null" as empty strings"""
+        values = self._column(df, column)
+        missing = values.isna() | values.isin(["NA", "null"])
+        return values.astype(str).str.strip().where(~missing, "")
+
+    def _valid_securities_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Mask of rows with every required field present and an integer SECURITY_ID"""
+        mask = pd.Series(True, index=df.index)
+        for field in SECURITY_REQUIRED_FIELDS:
+            values = self._column(df, field)
+            mask &= values.notna() & values.ne("") & values.ne(0)
+
+        return mask & pd.to_numeric(self._column(df, "SECURITY_ID"), errors="coerce").notna()
+
+    def _extract_derivative_data(self, derivatives_df: pd.DataFrame, instrument: pd.Series) -> pd.DataFrame:
+        """Extract derivative-specific columns for futures and options"""
         # Get expiry date from SM_EXPIRY_DATE field
-        expiry_date = self._parse_expiry_date(row.get("SM_EXPIRY_DATE"))
-        if expiry_date:
-            derivative_data['expiration_date'] = expiry_date
-            derivative_data['contract_month'] = self._get_contract_month_from_date(expiry_date)
-        else:
-            derivative_data['expiration_date'] = None
-            derivative_data['contract_month'] = 'UNK'
-
-        # Extract underlying information
-        derivative_data['underlying_symbol'] = self._safe_strip(row.get("UNDERLYING_SYMBOL"))
-        underlying_security_id = row.get("UNDERLYING_SECURITY_ID")
-        if underlying_security_id and underlying_security_id not in ["NA", "null"]:
-            derivative_data['underlying_security_id'] = underlying_security_id
-        else:
-            derivative_data['underlying_security_id'] = None
+        expiry = self._parse_expiry_dates(self._strip_column(derivatives_df, "SM_EXPIRY_DATE"))
+
+        # Extract underlying information; placeholders like "NA" and non-positive ids become None
+        underlying_security_id = pd.to_numeric(self._column(derivatives_df, "UNDERLYING_SECURITY_ID"), errors="coerce")
+        has_underlying_id = underlying_security_id.gt(0)
+
+        return pd.DataFrame(
+            {
+                'expiration_date': expiry.dt.date.astype(object).where(expiry.notna(), None),
+                'contract_month': expiry.dt.month.map(CONTRACT_MONTHS).fillna('UNK'),
+                'underlying_symbol': self._strip_column(derivatives_df, "UNDERLYING_SYMBOL"),
+                'underlying_security_id': underlying_security_id.where(has_underlying_id).astype("Int64").astype(object).where(has_underlying_id, None),
+                # Set settlement type based on instrument
+                'settlement_type': np.where(instrument.isin(CASH_SETTLED_INSTRUMENTS), SettlementType.CASH.value, SettlementType.PHYSICAL.value),
+            },
+            index=derivatives_df.index)
+
+    def _extract_option_data(self, options_df: pd.DataFrame) -> pd.DataFrame:
+        """Extract option-specific columns"""
+        strike_price = pd.to_numeric(self._column(options_df, "STRIKE_PRICE"), errors="coerce")
+        return pd.DataFrame({'strike_price': strike_price.astype(object).where(strike_price.notna(), None), 'option_type': self._strip_column(options_df, "OPTION_TYPE")}, index=options_df.index)
+
+    def _parse_expiry_dates(self, expiry: pd.Series) -> pd.Series:
+        """Parse a column of expiry date strings trying each known format in turn; unparseable values become NaT"""
+        parsed = pd.Series(pd.NaT, index=expiry.index, dtype="datetime64[ns]")
+
+        for date_format in EXPIRY_DATE_FORMATS:
+            unparsed = parsed.isna() & expiry.ne("")
+            if not unparsed.any():
+                break
+            parsed[unparsed] = pd.to_datetime(expiry[unparsed], format=date_format, errors="coerce")
+
+        unparsed_count = int((parsed.isna() & expiry.ne("")).sum())
+        if unparsed_count:
+            logger.debug(f"Could not parse {unparsed_count} expiry dates with any known format")
+        return parsed
+
+    async def _enrich_securities_async(self, securities_by_exchange: Dict[str, List[Dict[str, Any]]], batch_size: int, max_concurrency: int, use_cache: bool = True):
+        """Enrich securities in place, fetching all batches of all exchanges concurrently"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        transport = httpx.AsyncHTTPTransport(retries=3, limits=limits)
+
+        async with httpx.AsyncClient(transport=transport, timeout=60) as client:
+
+            async def enrich_batch(exchange_code: str, batch_isins: List[str], securities_by_isin: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+                # Securities sharing an ISIN share a sector; request each ISIN's symbol once
+                batch_symbols = list(dict.fromkeys(securities_by_isin[isin][0]['symbol'] for isin in batch_isins))
+                async with semaphore:
+                    sector_results = await self._fetch_sector_info_bulk_async(client, batch_symbols, exchange_code)
+
+                # Match by ISIN against the exchange-wide index and update securities in place; every coroutine runs on this one thread
+                for sector_result in sector_results.values():
+                    self._apply_sector_info(securities_by_isin.get(sector_result.get('isin', '').strip(), ()), sector_result)
+                return sector_results
 
-        # Set settlement type based on instrument
-        instrument = self._safe_strip(row.get("INSTRUMENT")).upper()
-        if instrument in ["FUTIDX", "OPTIDX"]:
-            derivative_data['settlement_type'] = SettlementType.CASH.value
-        else:
-            derivative_data['settlement_type'] = SettlementType.PHYSICAL.value
+            batches = []
+            for exchange_code, exchange_securities in securities_by_exchange.items():
+                securities_by_isin = {}
+                for sec in exchange_securities:
+                    securities_by_isin.setdefault(sec['isin'], []).append(sec)
+
+                # Apply sector info cached by earlier runs; only the remaining ISINs are requested
+                cached_results = self._get_cached_sector_info(exchange_code, list(securities_by_isin)) if use_cache else {}
+                for isin, sector_result in cached_results.items():
+                    self._apply_sector_info(securities_by_isin.pop(isin), sector_result)
+                if cached_results:
+                    logger.info(f"Applied cached sector info for {len(cached_results)} ISINs on {exchange_code}")
+
+                isins = list(securities_by_isin)
+                exchange_batch_size = min(batch_size, self._sector_batch_limits.get(exchange_code, batch_size))
+                batches.extend((exchange_code, isins[i:i + exchange_batch_size], securities_by_isin) for i in range(0, len(isins), exchange_batch_size))
+            logger.info(f"Fetching sector info in {len(batches)} batches across {len(securities_by_exchange)} exchanges")
+
+            results = await asyncio.gather(*(enrich_batch(*batch) for batch in batches), return_exceptions=True)
+
+        fetched_by_exchange = {}
+        for (exchange_code, batch_isins, _), result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error enriching batch of {len(batch_isins)} ISINs for exchange {exchange_code}: {result}")
+            else:
+                fetched_by_exchange.setdefault(exchange_code, {}).update(result)
+
+        for exchange_code, sector_results in fetched_by_exchange.items():
+            self._cache_sector_info(exchange_code, sector_results)
+
+    def _apply_sector_info(self, securities: List[Dict[str, Any]], sector_result: Dict[str, Any]):
+        """Set sector and industry on each security"""
+        for security in securities:
+            security['sector'] = sector_result.get('sector')
+            security['industry'] = sector_result.get('industry')
+
+    async def _fetch_sector_info_bulk_async(self, client: httpx.AsyncClient, symbols: List[str], exchange_code: str = "NSE") -> Dict[str, Any]:
+        """Send one POST request for multiple symbols (comma-separated) on an async client"""
+        # Once the endpoint has rejected a batch size for this exchange, send at most the accepted size
+        batch_limit = self._sector_batch_limits.get(exchange_code)
+        if batch_limit and len(symbols) > batch_limit:
+            results = {}
+            for i in range(0, len(symbols), batch_limit):
+                results.update(await self._fetch_sector_info_bulk_async(client, symbols[i:i + batch_limit], exchange_code))
+            return results
 
-        # Add option-specific data if it's an option
-        if instrument.startswith("OPT"):
-            derivative_data['strike_price'] = self._safe_float(row.get("STRIKE_PRICE"))
-            derivative_data['option_type'] = self._safe_strip(row.get("OPTION_TYPE"))
+        try:
+            logger.info(f"[Sector Enrichment] Requesting sector info for {len(symbols)} symbols on {exchange_code}")
 
-        return derivative_data
+            response = await self._post_sector_info_async(client, symbols, exchange_code)
+            response.raise_for_status()
 
-    def _parse_expiry_date(self, expiry_str: str) -> Optional[date]:
-        """Parse expiry date using datetime.strptime for multiple formats"""
-        if not expiry_str or expiry_str in ["NA", "null", "########"]:
-            return None
+            return self._parse_sector_info_response(response.json(), exchange_code)
 
-        # List of possible date formats
-        date_formats = [
-            "%Y-%m-%d",  # 2024-08-28
-            "%d-%m-%Y",  # 30-09-2025
-            "%Y/%m/%d",  # 2024/08/28
-            "%d/%m/%Y",  # 30/09/2025
-        ]
+        except httpx.HTTPStatusError as e:
+            if not self._is_oversize_rejection(e.response) or len(symbols) < 2:
+                logger.warning(f"[Sector Enrichment] Error in bulk sector info fetch for symbols {symbols} on {exchange_code}: {e}")
+                return {}
 
-        for date_format in date_formats:
-            try:
-                parsed_date = datetime.strptime(expiry_str.strip(), date_format)
-                return parsed_date.date()
-            except ValueError:
-                continue
+            # Symbol list too long for the endpoint: halve the exchange's batch limit and refetch in chunks of it
+            self._sector_batch_limits[exchange_code] = min(self._sector_batch_limits.get(exchange_code, len(symbols)), len(symbols) // 2)
+            logger.info(f"[Sector Enrichment] Batch of {len(symbols)} symbols rejected with HTTP {e.response.status_code} on {exchange_code}, splitting into batches of {self._sector_batch_limits[exchange_code]}")
+            return await self._fetch_sector_info_bulk_async(client, symbols, exchange_code)
 
-        logger.debug(f"Could not parse expiry date '{expiry_str}' with any known format")
-        return None
+        except Exception as e:
+            logger.warning(f"[Sector Enrichment] Error in bulk sector info fetch for symbols {symbols} on {exchange_code}: {e}")
+            return {}
 
-    def _get_contract_month_from_date(self, expiry_date: date) -> str:
-        """Get contract month from expiry date"""
-        try:
-            month_mapping = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN', 7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
-            return month_mapping.get(expiry_date.month, 'UNK')
-        except Exception:
-            return 'UNK'
+    def _is_oversize_rejection(self, response: httpx.Response) -> bool:
+        """Whether the sector scan endpoint rejected a request because the symbol list was too large"""
+        if response.status_code in SECTOR_INFO_OVERSIZE_STATUSES:
+            return True
+        return response.status_code == 400 and any(message in response.text.lower() for message in SECTOR_INFO_OVERSIZE_MESSAGES)
+
+    async def _post_sector_info_async(self, client: httpx.AsyncClient, symbols: List[str], exchange_code: str) -> httpx.Response:
+        """POST a sector scan request, retrying rate-limited and server-error responses with exponential backoff"""
+        payload = self._sector_info_payload(symbols, exchange_code)
+        for attempt in range(SECTOR_INFO_MAX_RETRIES + 1):
+            # The Redis bucket is blocking, so waiting for a token runs on a worker thread instead of stalling the loop
+            await asyncio.to_thread(self._sector_rate_limiter.acquire)
+            response = await client.post(SECTOR_INFO_URL, json=payload)
+            if response.status_code not in SECTOR_INFO_RETRY_STATUSES or attempt == SECTOR_INFO_MAX_RETRIES:
+                return response
+
+            delay = SECTOR_INFO_RETRY_BACKOFF_SECONDS * 2 ** attempt
+            logger.info(f"[Sector Enrichment] HTTP {response.status_code} for {len(symbols)} symbols on {exchange_code}, retrying in {delay}s")
+            await asyncio.sleep(delay)
 
-    def _safe_float(self, value, default: float = 0.0) -> float:
-        """Safely convert value to float"""
+    def _fetch_sector_info_bulk(self, url: str, symbols: List[str], exchange_code: str = "NSE") -> Dict[str, Any]:
+        """Send one POST request for multiple symbols (comma-separated)"""
         try:
-            if pd.isna(value) or value in ["NA", "null"]:
-                return default
-            return float(value)
-        except (ValueError, TypeError):
-            return default
-
-    def _enrich_exchange_securities(self, exchange_code: str, exchange_securities: List[Dict[str, Any]], batch_size: int):
-        """Enrich securities for a single exchange"""
-        logger.info(f"Processing {len(exchange_securities)} securities for exchange: {exchange_code}")
+            logger.info(f"[Sector Enrichment] Requesting sector info for {len(symbols)} symbols on {exchange_code}: {','.join(symbols)}")
 
-        for i in range(0, len(exchange_securities), batch_size):
-            batch = exchange_securities[i:i + batch_size]
-            batch_symbols = [sec['symbol'] for sec in batch]
+            self._sector_rate_limiter.acquire()
+            response = self._http.post(url, json=self._sector_info_payload(symbols, exchange_code), timeout=60)
+            response.raise_for_status()
 
-            # Build ISIN to security mapping for this batch
-            isin_to_security = {sec['isin']: sec for sec in batch}
+            return self._parse_sector_info_response(response.json(), exchange_code)
 
-            try:
-                sector_results = self.fetch_sector_info(None, batch_symbols, exchange_code)
+        except Exception as e:
+            logger.warning(f"[Sector Enrichment] Error in bulk sector info fetch for symbols {symbols} on {exchange_code}: {e}")
+            return {}
 
-                # Match by ISIN and update securities in place
-                for sector_result in sector_results.values():
-                    api_isin = sector_result.get('isin', '').strip()
+    def _sector_info_payload(self, symbols: List[str], exchange_code: str) -> Dict[str, Any]:
+        """Build the scan request body for a batch of symbols"""
+        return {"data": {"fields": ["Sector", "SubSector"], "params": [{"field": "Exch", "op": "", "val": exchange_code}, {"field": "Sym", "op": "", "val": ",".join(symbols)}]}}
 
-                    if not api_isin:
-                        continue
+    def _parse_sector_info_response(self, data: Dict[str, Any], exchange_code: str) -> Dict[str, Any]:
+        """Extract sector info keyed by ISIN from a scan response"""
+        if data.get("code") != 0 or "data" not in data:
+            raise ExternalAPIError("Dhan", f"Invalid response for sector info from {exchange_code}")
 
-                    security = isin_to_security.get(api_isin)
-                    if security:
-                        with self._lock:  # Thread-safe updates
-                            security['sector'] = sector_result.get('sector')
-                            security['industry'] = sector_result.get('industry')
+        results = {}
+        for item in data["data"]:
+            api_isin = item.get("Isin", "").strip()
+            if api_isin:
+                results[api_isin] = {"sector": item.get("Sector", "").strip(), "industry": item.get("SubSector", "").strip(), "symbol": item.get("DispSym", "").strip(), "isin": api_isin}
 
-                # Rate limiting between batches
-                if i + batch_size < len(exchange_securities):
-                    import time
-                    time.sleep(0.2)  # Reduced sleep for parallel processing
+        logger.info(f"[Sector Enrichment] Received sector info for {len(results)} securities from {exchange_code}")
+        return results
 
-            except Exception as e:
-                logger.warning(f"Error enriching batch {i//batch_size + 1} for exchange {exchange_code}: {e}")
-                continue
+    def _get_cached_sector_info(self, exchange_code: str, isins: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get sector info cached by earlier runs for the given ISINs, keyed by ISIN"""
+        if not isins:
+            return {}
 
-    def _fetch_sector_info_bulk(self, url: str, symbols: List[str], exchange_code: str = "NSE") -> Dict[str, Any]:
-        """Send one POST request for multiple symbols (comma-separated)"""
         try:
-            symbol_string = ",".join(symbols)
-            payload = {"data": {"fields": ["Sector", "SubSector"], "params": [{"field": "Exch", "op": "", "val": exchange_code}, {"field": "Sym", "op": "", "val": symbol_string}]}}
-
-            logger.info(f"[Sector Enrichment] Requesting sector info for {len(symbols)} symbols on {exchange_code}: {symbol_string}")
-
-            response = requests.post(url, json=payload, timeout=60)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if data.get("code") != 0 or "data" not in data:
-                raise ExternalAPIError("Dhan", f"Invalid response for sector info from {exchange_code}")
-
-            results = {}
-            for item in data["data"]:
-                api_isin = item.get("Isin", "").strip()
-                if api_isin:
-                    results[api_isin] = {"sector": item.get("Sector", "").strip(), "industry": item.get("SubSector", "").strip(), "symbol": item.get("DispSym", "").strip(), "isin": api_isin}
+            cached = self._redis.mget([f"{SECTOR_INFO_CACHE_KEY_PREFIX}:{exchange_code}:{isin}" for isin in isins])
+        except redis.RedisError as e:
+            logger.warning(f"[Sector Enrichment] Sector info cache unavailable, fetching all ISINs: {e}")
+            return {}
 
-            logger.info(f"[Sector Enrichment] Received sector info for {len(results)} securities from {exchange_code}")
-            return results
+        return {isin: json.loads(value) for isin, value in zip(isins, cached) if value is not None}
 
-        except Exception as e:
-            logger.warning(f"[Sector Enrichment] Error in bulk sector info fetch for symbols {symbols} on {exchange_code}: {e}")
-            return {}
+    def _cache_sector_info(self, exchange_code: str, sector_results: Dict[str, Dict[str, Any]]):
+        """Cache sector info per ISIN for later runs"""
+        if not sector_results:
+            return
 
-    def get_ohlcv_data(self, security_id: int, date_from: date, date_to: date, exchange_segment: str = "NSE_EQ", interval: str = "1D") -> List[Dict[str, Any]]:
-        """Fetch OHLCV data for a security from Dhan API"""
+        ttl_seconds = int(settings.external.DHAN_SECTOR_CACHE_TTL_DAYS) * 24 * 3600
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for isin, sector_result in sector_results.items():
+                    pipe.set(f"{SECTOR_INFO_CACHE_KEY_PREFIX}:{exchange_code}:{isin}", json.dumps({'sector': sector_result.get('sector'), 'industry': sector_result.get('industry')}), ex=ttl_seconds)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"[Sector Enrichment] Could not cache sector info for {exchange_code}: {e}")
+
+    def get_ohlcv_segment(self, security_type: str) -> Tuple[str, str]:
+        """Get the Dhan (exchange_segment, instrument_type) pair for a security type, defaulting to NSE equity"""
+        return OHLCV_SEGMENTS_BY_SECURITY_TYPE.get(security_type, ("NSE_EQ", "EQUITY"))
+
+    def get_ohlcv_data(self, security_id: int, date_from: date, date_to: date, exchange_segment: str = "NSE_EQ", interval: str = "1D", instrument_type: str = "EQUITY") -> List[Dict[str, Any]]:
+        """Fetch OHLCV data for a security from Dhan API, sharing the Dhan data rate limit across threads and processes"""
+        self._ohlcv_rate_limiter.acquire()
+        return self._fetch_ohlcv_data(security_id, date_from, date_to, exchange_segment, interval, instrument_type)
+
+    def _fetch_ohlcv_data(self, security_id: int, date_from: date, date_to: date, exchange_segment: str = "NSE_EQ", interval: str = "1D", instrument_type: str = "EQUITY") -> List[Dict[str, Any]]:
+        """Fetch OHLCV data for a security from Dhan API without rate limiting"""
         try:
-            logger.info(f"Fetching OHLCV data for security {security_id} from {date_from} to {date_to}")
+            logger.debug("Fetching OHLCV data for security {} from {} to {}", security_id, date_from, date_to)
 
             # Convert dates to required format for Dhan API
             from_date_str = date_from.strftime('%Y-%m-%d')
             to_date_str = date_to.strftime('%Y-%m-%d')
 
             # Call Dhan API for historical data
-            response = self.dhan_context.historical_data(symbol=str(security_id), exchange_segment=exchange_segment, instrument_type="EQUITY", expiry_code=0, from_date=from_date_str, to_date=to_date_str, interval=interval)
+            response = self.dhan_context.historical_data(symbol=str(security_id), exchange_segment=exchange_segment, instrument_type=instrument_type, expiry_code=0, from_date=from_date_str, to_date=to_date_str, interval=interval)
 
             if response is None:
                 logger.warning(f"No OHLCV data received for security {security_id}")
@@ -530,7 +640,7 @@ class DhanService:
                     logger.warning(f"Error processing OHLCV data point for security {security_id}: {e}")
                     continue
 
-            logger.info(f"Fetched {len(ohlcv_data)} OHLCV records for security {security_id}")
+            logger.debug("Fetched {} OHLCV records for security {}", len(ohlcv_data), security_id)
             return ohlcv_data
 
         except Exception as e:
@@ -547,7 +657,7 @@ class DhanService:
             required_fields = ['date', 'open', 'high', 'low', 'close']
             for field in required_fields:
                 if field not in data_point:
-                    logger.debug(f"Missing required field '{field}' in OHLCV data")
+                    logger.debug("Missing required field '{}' in OHLCV data", field)
                     return None
 
             # Parse and validate date
@@ -558,7 +668,7 @@ class DhanService:
                     # Handle timestamp format if needed
                     trade_date = data_point['date']
             except ValueError as e:
-                logger.debug(f"Invalid date format in OHLCV data: {data_point['date']}")
+                logger.debug("Invalid date format in OHLCV data: {}", data_point['date'])
                 return None
 
             # Validate price data
@@ -566,12 +676,12 @@ class DhanService:
 
             # Check if all prices are valid and positive
             if any(price is None or price <= 0 for price in prices.values()):
-                logger.debug(f"Invalid price data in OHLCV record: {prices}")
+                logger.debug("Invalid price data in OHLCV record: {}", prices)
                 return None
 
             # Validate price relationships (high >= open, close, low)
             if not (prices['high'] >= prices['open'] and prices['high'] >= prices['close'] and prices['high'] >= prices['low'] and prices['low'] <= prices['open'] and prices['low'] <= prices['close']):
-                logger.debug(f"Invalid price relationships in OHLCV data: {prices}")
+                logger.debug("Invalid price relationships in OHLCV data: {}", prices)
                 return None
 
             # Process volume and other optional fields
@@ -600,43 +710,36 @@ class DhanService:
             logger.warning(f"Error processing OHLCV data point: {e}")
             return None
 
-    def get_bulk_ohlcv_data(self, security_ids: List[int], date_from: date, date_to: date, max_workers: int = 3, delay_between_calls: float = 0.5) -> Dict[int, List[Dict[str, Any]]]:
+    def get_bulk_ohlcv_data(self, security_ids: List[int], date_from: date, date_to: date, max_concurrency: int = 10) -> Dict[int, List[Dict[str, Any]]]:
         """Fetch OHLCV data for multiple securities with rate limiting"""
-        import threading
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        return asyncio.run(self.get_bulk_ohlcv_data_async(security_ids, date_from, date_to, max_concurrency))
 
+    async def get_bulk_ohlcv_data_async(self, security_ids: List[int], date_from: date, date_to: date, max_concurrency: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+        """Fetch OHLCV data for multiple securities from one event loop, paced by the shared Dhan data rate limit"""
         logger.info(f"Fetching bulk OHLCV data for {len(security_ids)} securities")
 
-        results = {}
-        failed_securities = []
-        lock = threading.Lock()
+        # dhanhq is blocking, so each call runs on a worker thread; the semaphore bounds how many are in flight
+        semaphore = asyncio.Semaphore(max_concurrency)
 
-        def fetch_single_security(security_id: int) -> Tuple[int, List[Dict[str, Any]]]:
+        async def fetch_single_security(security_id: int) -> List[Dict[str, Any]]:
             """Fetch OHLCV data for a single security"""
-            try:
-                # Add delay for rate limiting
-                time.sleep(delay_between_calls)
+            async with semaphore:
+                # get_ohlcv_data takes from the Redis token bucket, so bulk fetches share the budget with every other worker
+                return await asyncio.to_thread(self.get_ohlcv_data, security_id, date_from, date_to)
 
-                ohlcv_data = self.get_ohlcv_data(security_id, date_from, date_to)
-                return security_id, ohlcv_data
+        responses = await asyncio.gather(*[fetch_single_security(security_id) for security_id in security_ids], return_exceptions=True)
 
-            except Exception as e:
-                logger.warning(f"Failed to fetch OHLCV for security {security_id}: {e}")
-                with lock:
-                    failed_securities.append(security_id)
-                return security_id, []
-
-        # Use ThreadPoolExecutor with limited workers for rate limiting
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_security = {executor.submit(fetch_single_security, security_id): security_id for security_id in security_ids}
-
-            # Collect results
-            for future in as_completed(future_to_security):
-                security_id, ohlcv_data = future.result()
-                results[security_id] = ohlcv_data
+        results = {}
+        failed_securities = []
+        for security_id, response in zip(security_ids, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"Failed to fetch OHLCV for security {security_id}: {response}")
+                failed_securities.append(security_id)
+                results[security_id] = []
+            else:
+                results[security_id] = response
 
-        logger.info(f"Bulk OHLCV fetch completed: {len(results)} successful, {len(failed_securities)} failed")
+        logger.info(f"Bulk OHLCV fetch completed: {len(results) - len(failed_securities)} successful, {len(failed_securities)} failed")
 
         if failed_securities:
             logger.warning(f"Failed to fetch OHLCV data for securities: {failed_securities}")
@@ -744,8 +847,6 @@ class DhanService:
             return {'error': 'No data provided'}
 
         try:
-            import pandas as pd
-
             # Convert to DataFrame for easy analysis
             df = pd.DataFrame(ohlcv_data)
             df['date'] = pd.to_datetime(df['date'])
@@ -5,21 +5,33 @@ Handles data import, processing, and retrieval with parallel processing support.
 """
 
 import pandas as pd
+from collections import namedtuple
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import date, datetime, timedelta
-from sqlalchemy.orm import Session
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.sql.elements import ColumnElement
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 from app.repositories.market_data import OHLCVRepository, MarketDataImportLogRepository
 from app.repositories.securities import SecurityRepository
 from app.services.dhan_service import DhanService
 from app.models.securities import Security
+from app.core.exceptions import DatabaseError
 from app.utils.logger import get_logger
 from app.utils.enum import Timeframe
 
 logger = get_logger(__name__)
 
+# Rows per write batch handed to the background OHLCV writer
+OHLCV_WRITE_BATCH_SIZE = 5000
+
+# Outcome of a successful per-security fetch, carried from the fetch loop to import log creation
+FetchResult = namedtuple('FetchResult', 'security conversion_errors')
+
+# Plain copy of the Security columns the import reads; unlike ORM instances it is not expired by commits in between
+ImportSecurity = namedtuple('ImportSecurity', 'id external_id symbol security_type exchange_id')
+
 
 class OHLCVService:
     """Service for OHLCV data operations with comprehensive import and processing capabilities"""
@@ -30,14 +42,14 @@ class OHLCVService:
         self.security_repo = SecurityRepository(db)
         self.import_log_repo = MarketDataImportLogRepository(db)
         self.dhan_service = DhanService()
-        self._lock = threading.Lock()
 
-    def import_ohlcv_data(self, security_id: Optional[str] = None, date_from: date = None, date_to: date = None, timeframe: str = Timeframe.DAILY.value, import_type: str = "INCREMENTAL") -> Dict[str, Any]:
+    def import_ohlcv_data(self, security_id: Optional[str] = None, date_from: date = None, date_to: date = None, timeframe: str = Timeframe.DAILY.value, import_type: str = "INCREMENTAL", securities: Optional[List[Security]] = None) -> Dict[str, Any]:
         """
         Import OHLCV data for securities from Dhan API
         
         Args:
             security_id: Specific security ID or None for all active securities
+            securities: Securities already selected by the caller (see _snapshot_import_securities), to skip querying them again
             date_from: Start date for import
             date_to: End date for import  
             timeframe: Data timeframe (DAILY, WEEKLY, etc.)
@@ -54,11 +66,12 @@ class OHLCVService:
         logger.info(f"Starting OHLCV import: {date_from} to {date_to} ({import_type})")
 
         try:
-            # Get securities to process
-            if security_id:
-                securities = [self.security_repo.get_by_id_or_raise(security_id)]
-            else:
-                securities = self._get_securities_for_import(import_type)
+            # Get securities to process, unless the caller already selected them
+            if securities is None:
+                if security_id:
+                    securities = [self.security_repo.get_by_id_or_raise(security_id)]
+                else:
+                    securities = self._get_securities_for_import(import_type)
 
             if not securities:
                 return {'status': 'SUCCESS', 'message': 'No securities found for import', 'total_securities': 0, 'import_stats': {}}
@@ -87,169 +100,175 @@ class OHLCVService:
 
             return {'status': 'FAILURE', 'message': error_msg, 'total_securities': 0, 'import_stats': {'errors': 1}}
 
+    def _importable_securities_filter(self, import_type: str) -> ColumnElement:
+        """Predicate for securities eligible for an OHLCV import of the given type (matches idx_securities_importable_type)"""
+        conditions = [Security.is_active == True, Security.is_tradeable == True, Security.is_deleted == False]
+
+        # FULL imports every tradeable security; other import types prioritize equities and indices
+        if import_type != "FULL":
+            conditions.append(Security.security_type.in_(['EQUITY', 'INDEX']))
+
+        return and_(*conditions)
+
     def _get_securities_for_import(self, import_type: str) -> List[Security]:
         """Get securities that need OHLCV data import"""
 
-        # Get active securities that are tradeable
-        base_query = self.db.query(Security).filter(Security.is_active == True, Security.is_tradeable == True, Security.is_deleted == False)
-
-        # For derivatives, we primarily want underlying securities
-        # but can also import derivative data if needed
-        if import_type == "FULL":
-            # Get all tradeable securities
-            securities = base_query.all()
-        else:
-            # For incremental, prioritize equities and indices
-            securities = base_query.filter(Security.security_type.in_(['EQUITY', 'INDEX'])).all()
+        # Only the columns the import touches are loaded; exchange_id keeps security.exchange resolvable from the identity map
+        securities = self.db.query(Security).options(load_only(Security.id, Security.symbol, Security.security_type, Security.external_id, Security.exchange_id)).filter(self._importable_securities_filter(import_type)).all()
 
         logger.info(f"Found {len(securities)} securities for {import_type} import")
         return securities
 
-    def _process_securities_parallel(self, securities: List[Security], date_from: date, date_to: date, timeframe: str, import_type: str, max_workers: int = 4) -> Dict[str, int]:
-        """Process securities with parallel execution"""
+    def _snapshot_import_securities(self, securities: List[Security]) -> List[ImportSecurity]:
+        """Copy the columns the import reads out of loaded securities, so later commits cannot force a reload per security"""
+        return [ImportSecurity(security.id, security.external_id, security.symbol, security.security_type, security.exchange_id) for security in securities]
 
-        stats = {'total_processed': 0, 'successful': 0, 'failed': 0, 'records_created': 0, 'records_updated': 0, 'records_skipped': 0}
+    def _process_securities_parallel(self, securities: List[Security], date_from: date, date_to: date, timeframe: str, import_type: str, max_workers: int = 8) -> Dict[str, int]:
+        """Fetch OHLCV data concurrently while a background writer stores completed batches"""
 
-        # Group securities for batch processing
-        batch_size = max(1, len(securities) // max_workers)
-        security_batches = [securities[i:i + batch_size] for i in range(0, len(securities), batch_size)]
+        stats = {'total_processed': 0, 'successful': 0, 'failed': 0, 'records_created': 0, 'records_updated': 0, 'records_skipped': 0}
 
-        logger.info(f"Processing {len(securities)} securities in {len(security_batches)} batches with {max_workers} workers")
+        # FetchResult per fetched security, keyed by str(security.id)
+        fetched_securities = {}
+        write_results = {}
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit batch processing tasks
-            future_to_batch = {}
-            for i, batch in enumerate(security_batches):
-                future = executor.submit(self._process_security_batch, batch, date_from, date_to, timeframe, import_type, i)
-                future_to_batch[future] = i
+        logger.info(f"Fetching OHLCV data for {len(securities)} securities with {max_workers} workers")
 
-            # Collect results from all batches
-            for future in as_completed(future_to_batch):
-                batch_idx = future_to_batch[future]
-                try:
-                    batch_stats = future.result()
+        # Dedicated session for the writer thread: the caller's session stays with the thread that owns it
+        writer_db = Session(bind=self.db.get_bind())
+        ohlcv_repo = OHLCVRepository(writer_db)
 
-                    # Merge stats thread-safely
-                    with self._lock:
-                        for key in ['total_processed', 'successful', 'failed', 'records_created', 'records_updated', 'records_skipped']:
-                            stats[key] += batch_stats.get(key, 0)
+        # FULL and BACKFILL loads are re-fetchable, so their commits need not wait on the WAL flush
+        synchronous_commit = import_type not in ("FULL", "BACKFILL")
 
-                    logger.info(f"Batch {batch_idx} completed: {batch_stats}")
+        pending_rows = []
+        pending_write = None
+        try:
+            # A single writer thread commits batch N while the fetch pool keeps collecting batch N+1
+            with ThreadPoolExecutor(max_workers=1) as write_executor, ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Single pass: resolve each security's Dhan segment and submit its fetch together
+                get_segment = self.dhan_service.get_ohlcv_segment
+                fetch = self.dhan_service.get_ohlcv_data
+                future_to_security = {}
+                for security in securities:
+                    exchange_segment, instrument_type = get_segment(security.security_type)
+                    future_to_security[executor.submit(fetch, security.external_id, date_from, date_to, exchange_segment, instrument_type=instrument_type)] = security
+
+                for future in as_completed(future_to_security):
+                    security = future_to_security[future]
+                    stats['total_processed'] += 1
+
+                    try:
+                        ohlcv_data = future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to import OHLCV for {security.symbol}: {e}")
+                        stats['failed'] += 1
+                        continue
+
+                    stats['successful'] += 1
+
+                    if not ohlcv_data:
+                        logger.debug("No OHLCV data received for {}", security.symbol)
+                        stats['records_skipped'] += 1
+                        continue
+
+                    ohlcv_rows, conversion_errors = self._convert_security_ohlcv(security, ohlcv_data, timeframe)
+                    fetched_securities[str(security.id)] = FetchResult(security, conversion_errors)
+                    pending_rows.extend(ohlcv_rows)
+
+                    if len(pending_rows) >= OHLCV_WRITE_BATCH_SIZE:
+                        pending_write = self._submit_ohlcv_write(write_executor, ohlcv_repo, pending_rows, pending_write, write_results, synchronous_commit)
+                        pending_rows = []
+
+                if pending_rows:
+                    pending_write = self._submit_ohlcv_write(write_executor, ohlcv_repo, pending_rows, pending_write, write_results, synchronous_commit)
+
+                # Surfaces any unexpected writer exception on this thread
+                if pending_write is not None:
+                    self._merge_write_results(write_results, pending_write.result())
+        finally:
+            writer_db.close()
+
+        # Per-security import logs go out in one round trip instead of one commit each
+        import_logs = []
+        for security_key, fetch_result in fetched_securities.items():
+            security_stats = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': fetch_result.conversion_errors}
+            for key, value in write_results.get(security_key, {}).items():
+                security_stats[key] += value
+
+            stats['records_created'] += security_stats['created']
+            stats['records_updated'] += security_stats['updated']
+            import_logs.append(self._build_security_import_log(fetch_result.security, date_from, date_to, security_stats, import_type))
 
-                except Exception as e:
-                    logger.error(f"Batch {batch_idx} failed: {e}")
-                    with self._lock:
-                        stats['failed'] += len(security_batches[batch_idx])
+        try:
+            self.import_log_repo.bulk_create_import_logs(import_logs)
+        except Exception as e:
+            logger.error(f"Failed to create {len(import_logs)} security import logs: {e}")
 
+        logger.info(f"Processed {stats['total_processed']} securities: {stats}")
         return stats
 
-    def _process_security_batch(self, securities: List[Security], date_from: date, date_to: date, timeframe: str, import_type: str, batch_idx: int) -> Dict[str, int]:
-        """Process a batch of securities in a single thread"""
-        from app.core.database import DatabaseManager
-        from app.core.config import settings
-
-        # Create new DB session for this thread
-        thread_db_manager = DatabaseManager(settings.database.DB_URL)
+    def _submit_ohlcv_write(self, write_executor: ThreadPoolExecutor, ohlcv_repo: OHLCVRepository, batch: List[Tuple], pending_write: Optional[Future], write_results: Dict[str, Dict[str, int]], synchronous_commit: bool = True) -> Future:
+        """Wait for the in-flight write (backpressure), merge its counts, then hand the next batch to the writer"""
+        if pending_write is not None:
+            self._merge_write_results(write_results, pending_write.result())
 
-        with thread_db_manager.get_session() as thread_db:
-            # Create repositories with thread-local session
-            ohlcv_repo = OHLCVRepository(thread_db)
-            import_log_repo = MarketDataImportLogRepository(thread_db)
-
-            batch_stats = {'total_processed': len(securities), 'successful': 0, 'failed': 0, 'records_created': 0, 'records_updated': 0, 'records_skipped': 0}
-
-            logger.info(f"Batch {batch_idx}: Processing {len(securities)} securities")
-
-            for security in securities:
-                try:
-                    # Import OHLCV data for this security
-                    security_stats = self._import_security_ohlcv(security, date_from, date_to, timeframe, ohlcv_repo, import_log_repo, import_type)
-
-                    batch_stats['successful'] += 1
-                    batch_stats['records_created'] += security_stats.get('created', 0)
-                    batch_stats['records_updated'] += security_stats.get('updated', 0)
-                    batch_stats['records_skipped'] += security_stats.get('skipped', 0)
-
-                except Exception as e:
-                    logger.warning(f"Failed to import OHLCV for {security.symbol}: {e}")
-                    batch_stats['failed'] += 1
-                    continue
-
-            logger.info(f"Batch {batch_idx} completed: {batch_stats}")
-            return batch_stats
-
-    def _import_security_ohlcv(self, security: Security, date_from: date, date_to: date, timeframe: str, ohlcv_repo: OHLCVRepository, import_log_repo: MarketDataImportLogRepository, import_type: str) -> Dict[str, int]:
-        """Import OHLCV data for a single security"""
-
-        security_stats = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        return write_executor.submit(self._write_ohlcv_batch, ohlcv_repo, batch, synchronous_commit)
 
+    def _write_ohlcv_batch(self, ohlcv_repo: OHLCVRepository, batch: List[Tuple], synchronous_commit: bool = True) -> Dict[Any, Dict[str, int]]:
+        """Upsert one batch of OHLCV rows, counting a failed batch as errors against its securities"""
         try:
-            # Get OHLCV data from Dhan API
-            ohlcv_data = self.dhan_service.get_ohlcv_data(security.external_id, date_from, date_to)
-
-            if not ohlcv_data:
-                logger.debug(f"No OHLCV data received for {security.symbol}")
-                security_stats['skipped'] += 1
-                return security_stats
-
-            # Process and store OHLCV data
-            for data_point in ohlcv_data:
-                try:
-                    ohlcv_dict = self._convert_dhan_ohlcv_to_dict(data_point, security.id)
-
-                    existing = ohlcv_repo.get_by_security_and_date(security.id, ohlcv_dict['date'], timeframe)
-
-                    if existing:
-                        # Update existing record
-                        ohlcv_repo.update(existing, ohlcv_dict)
-                        security_stats['updated'] += 1
-                    else:
-                        # Create new record
-                        ohlcv_dict['timeframe'] = timeframe
-                        new_ohlcv = ohlcv_repo.create(type(ohlcv_repo.model)(**ohlcv_dict))
-                        security_stats['created'] += 1
-
-                except Exception as e:
-                    logger.warning(f"Error processing OHLCV data point for {security.symbol}: {e}")
-                    security_stats['errors'] += 1
-                    continue
-
-            # Create import log for this security
-            self._create_security_import_log(security, date_from, date_to, security_stats, import_type, import_log_repo)
-
-        except Exception as e:
-            logger.error(f"Error importing OHLCV for security {security.symbol}: {e}")
-            security_stats['errors'] += 1
-
-        return security_stats
-
-    def _convert_dhan_ohlcv_to_dict(self, dhan_data: Dict[str, Any], security_id: str) -> Dict[str, Any]:
-        """Convert Dhan API OHLCV data to our database format"""
-
-        return {
-            'security_id': security_id,
-            'date': datetime.strptime(dhan_data['date'], '%Y-%m-%d').date(),
-            'open_price': float(dhan_data['open']),
-            'high_price': float(dhan_data['high']),
-            'low_price': float(dhan_data['low']),
-            'close_price': float(dhan_data['close']),
-            'volume': int(dhan_data.get('volume', 0)),
-            'value': float(dhan_data.get('value', 0)) if dhan_data.get('value') else None,
-            'trades': int(dhan_data.get('trades', 0)) if dhan_data.get('trades') else None,
-            'data_source': 'DHAN',
-            'last_updated': datetime.now(),
-            'is_adjusted': False  # Dhan provides raw prices
-        }
-
-    def _create_security_import_log(self, security: Security, date_from: date, date_to: date, stats: Dict[str, int], import_type: str, import_log_repo: MarketDataImportLogRepository):
-        """Create import log for a security"""
+            return ohlcv_repo.bulk_upsert_ohlcv(batch, synchronous_commit=synchronous_commit)
+        except DatabaseError as e:
+            logger.error(f"Failed to write batch of {len(batch)} OHLCV rows: {e}")
+            batch_results = {}
+            for row in batch:
+                batch_results.setdefault(row[0], {'errors': 0})['errors'] += 1
+            return batch_results
+
+    def _merge_write_results(self, write_results: Dict[str, Dict[str, int]], batch_results: Dict[Any, Dict[str, int]]):
+        """Accumulate per-security counts from one written batch, keyed by str(security_id)"""
+        for security_id, counts in batch_results.items():
+            security_counts = write_results.setdefault(str(security_id), {})
+            for key, value in counts.items():
+                security_counts[key] = security_counts.get(key, 0) + value
+
+    def _convert_security_ohlcv(self, security: Security, ohlcv_data: List[Dict[str, Any]], timeframe: str) -> Tuple[List[Tuple], int]:
+        """Convert fetched OHLCV data for a single security into upsert rows, returning the rows and the conversion error count"""
+
+        ohlcv_rows = []
+        errors = 0
+
+        for data_point in ohlcv_data:
+            try:
+                ohlcv_rows.append(self._convert_dhan_ohlcv_to_row(data_point, security.id, timeframe))
+            except Exception as e:
+                logger.warning(f"Error processing OHLCV data point for {security.symbol}: {e}")
+                errors += 1
+
+        return ohlcv_rows, errors
+
+    def _convert_dhan_ohlcv_to_row(self, dhan_data: Dict[str, Any], security_id: str, timeframe: str) -> Tuple:
+        """Convert Dhan API OHLCV data to an upsert row ordered as OHLCV_UPSERT_COLUMNS"""
+
+        return (
+            security_id,
+            date.fromisoformat(dhan_data['date']),
+            timeframe,
+            float(dhan_data['open']),
+            float(dhan_data['high']),
+            float(dhan_data['low']),
+            float(dhan_data['close']),
+            int(dhan_data.get('volume', 0)),
+        )
+
+    def _build_security_import_log(self, security: Security, date_from: date, date_to: date, stats: Dict[str, int], import_type: str) -> Dict[str, Any]:
+        """Build import log data for a security"""
 
         total_processed = stats['created'] + stats['updated'] + stats['skipped'] + stats['errors']
         status = 'SUCCESS' if stats['errors'] == 0 else 'PARTIAL' if total_processed > stats['errors'] else 'FAILURE'
 
-        log_data = {'security_id': security.id, 'import_date': date.today(), 'date_from': date_from, 'date_to': date_to, 'total_records_processed': total_processed, 'records_created': stats['created'], 'records_updated': stats['updated'], 'records_skipped': stats['skipped'], 'records_failed': stats['errors'], 'status': status, 'data_source': 'DHAN', 'import_type': import_type}
-
-        import_log_repo.create_import_log(log_data)
+        return {'security_id': security.id, 'import_date': date.today(), 'date_from': date_from, 'date_to': date_to, 'total_records_processed': total_processed, 'records_created': stats['created'], 'records_updated': stats['updated'], 'records_skipped': stats['skipped'], 'records_failed': stats['errors'], 'status': status, 'data_source': 'DHAN', 'import_type': import_type}
 
     def _create_summary_import_log(self, securities: List[Security], date_from: date, date_to: date, stats: Dict[str, int], import_type: str, start_time: datetime):
         """Create summary import log for the entire operation"""
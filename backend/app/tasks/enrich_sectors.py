@@ -114,66 +114,75 @@ def enrich_sectors_from_dhan(self, force_refresh: bool = False) -> Dict[str, Any
             self.fail_step('group_securities', f'Failed to group securities: {str(e)}')
             raise
 
-        # Step 4: Process Securities by Exchange
-        self.start_step('enrich_data', 'Enrich Sector Data', 'Processing securities by exchange...')
+        # Step 4: Enrich all exchanges in one call, so their batches share the service's concurrent fan-out
+        self.start_step('enrich_data', 'Enrich Sector Data', 'Processing securities across exchanges...')
+        self._update_progress(20, f'Fetching sector data for {total_securities} securities across {len(securities_by_exchange)} exchanges...')
 
         total_enriched = 0
         total_errors = 0
         exchange_results = {}
 
-        for i, (exchange_code, exchange_securities) in enumerate(securities_by_exchange.items()):
-            try:
-                progress = 20 + (i / len(securities_by_exchange)) * 70  # 20% to 90%
-                self._update_progress(int(progress), f'Processing {len(exchange_securities)} securities for {exchange_code}...')
-
-                # Convert securities to the format expected by DhanService
-                securities_data = []
-                for security in exchange_securities:
-                    securities_data.append({'symbol': security.symbol, 'external_id': security.external_id, 'isin': security.isin, 'security_type': security.security_type})
+        # Convert securities to the format expected by DhanService, indexing them and their exchange by external_id in the same pass
+        securities_data = []
+        securities_by_external_id = {}
+        exchange_codes_by_external_id = {}
+        for exchange_code, exchange_securities in securities_by_exchange.items():
+            for security in exchange_securities:
+                external_id = security.external_id
+                security_data = {'symbol': security.symbol, 'external_id': external_id, 'isin': security.isin, 'security_type': security.security_type}
+                # 'UNKNOWN' is only a grouping label; without an exchange_code the service requests the security on its NSE default
+                if exchange_code != 'UNKNOWN':
+                    security_data['exchange_code'] = exchange_code
+                securities_data.append(security_data)
+                securities_by_external_id[external_id] = security
+                exchange_codes_by_external_id[external_id] = exchange_code
 
-                # Use DhanService to enrich with sector data
-                enriched_securities = dhan_service.enrich_securities_with_sector_info(
-                    securities_data,
-                    batch_size=15,
-                    max_workers=2  # Conservative for manual task
-                )
+        try:
+            # Use DhanService to enrich with sector data
+            enriched_securities = dhan_service.enrich_securities_with_sector_info(securities_data, force_refresh=force_refresh)
+        except Exception as e:
+            logger.error(f"Error enriching securities with sector data: {e}")
+            enriched_securities = []
+            for exchange_code, exchange_securities in securities_by_exchange.items():
+                exchange_results[exchange_code] = {'total_securities': len(exchange_securities), 'enriched_count': 0, 'error_count': len(exchange_securities), 'error_message': str(e)}
+            total_errors = total_securities
 
-                # Update database with enriched data
-                exchange_enriched = 0
-                exchange_errors = 0
+        self._update_progress(80, 'Updating securities with sector data...')
 
-                for enriched_security in enriched_securities:
-                    try:
-                        # Find the security in database by external_id
-                        security = next((s for s in exchange_securities if s.external_id == enriched_security['external_id']), None)
+        # Update database with enriched data
+        exchange_counts = {exchange_code: {'enriched_count': 0, 'error_count': 0} for exchange_code in securities_by_exchange}
 
-                        if security and (enriched_security.get('sector') or enriched_security.get('industry')):
-                            # Update security with sector/industry data
-                            update_data = {}
-                            if enriched_security.get('sector'):
-                                update_data['sector'] = enriched_security['sector']
-                            if enriched_security.get('industry'):
-                                update_data['industry'] = enriched_security['industry']
+        for enriched_security in enriched_securities:
+            counts = exchange_counts[exchange_codes_by_external_id[enriched_security['external_id']]]
+            try:
+                # Find the security in database by external_id
+                security = securities_by_external_id.get(enriched_security['external_id'])
 
-                            if update_data:
-                                security_repo.update(security, update_data)
-                                exchange_enriched += 1
+                if security and (enriched_security.get('sector') or enriched_security.get('industry')):
+                    # Update security with sector/industry data
+                    update_data = {}
+                    if enriched_security.get('sector'):
+                        update_data['sector'] = enriched_security['sector']
+                    if enriched_security.get('industry'):
+                        update_data['industry'] = enriched_security['industry']
 
-                    except Exception as e:
-                        logger.warning(f"Error updating security {enriched_security.get('symbol', 'unknown')}: {e}")
-                        exchange_errors += 1
+                    if update_data:
+                        security_repo.update(security, update_data)
+                        counts['enriched_count'] += 1
 
-                total_enriched += exchange_enriched
-                total_errors += exchange_errors
+            except Exception as e:
+                logger.warning(f"Error updating security {enriched_security.get('symbol', 'unknown')}: {e}")
+                counts['error_count'] += 1
 
-                exchange_results[exchange_code] = {'total_securities': len(exchange_securities), 'enriched_count': exchange_enriched, 'error_count': exchange_errors}
+        if enriched_securities:
+            for exchange_code, exchange_securities in securities_by_exchange.items():
+                counts = exchange_counts[exchange_code]
+                total_enriched += counts['enriched_count']
+                total_errors += counts['error_count']
 
-                self.log_message('INFO', f'Completed {exchange_code}: enriched {exchange_enriched}/{len(exchange_securities)} securities')
+                exchange_results[exchange_code] = {'total_securities': len(exchange_securities), **counts}
 
-            except Exception as e:
-                logger.error(f"Error processing exchange {exchange_code}: {e}")
-                total_errors += len(exchange_securities)
-                exchange_results[exchange_code] = {'total_securities': len(exchange_securities), 'enriched_count': 0, 'error_count': len(exchange_securities), 'error_message': str(e)}
+                self.log_message('INFO', f'Completed {exchange_code}: enriched {counts["enriched_count"]}/{len(exchange_securities)} securities')
 
         # Commit all changes
         try:
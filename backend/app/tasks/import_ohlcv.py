@@ -92,10 +92,8 @@ def import_ohlcv_from_dhan(self, security_id: Optional[str] = None, date_from: O
         self._update_progress(10, 'Initializing services and testing connections...')
 
         try:
-            # Test Dhan API connection
-            from app.services.dhan_service import DhanService
-            dhan_service = DhanService()
-            connection_test = dhan_service.test_connection()
+            # Test Dhan API connection on the client the import will use
+            connection_test = ohlcv_service.dhan_service.test_connection()
 
             self.complete_step('init_services', 'Services initialized and connection tested', {'connection_test': connection_test, 'services_ready': True})
             logger.info("Services initialized successfully")
@@ -139,6 +137,9 @@ def import_ohlcv_from_dhan(self, security_id: Optional[str] = None, date_from: O
                 exchange_code = security.exchange.code if security.exchange else 'UNKNOWN'
                 securities_info['exchanges'][exchange_code] = securities_info['exchanges'].get(exchange_code, 0) + 1
 
+            # Every step update commits, expiring the loaded instances; keep plain copies so the import doesn't reload each one
+            securities = ohlcv_service._snapshot_import_securities(securities)
+
             self.complete_step('get_securities', f'Found {total_securities} securities to process', securities_info)
             self.log_message('INFO', f'Processing {total_securities} securities for OHLCV import', securities_info)
 
@@ -152,7 +153,7 @@ def import_ohlcv_from_dhan(self, security_id: Optional[str] = None, date_from: O
 
         try:
             # Call the service method for actual import
-            import_result = ohlcv_service.import_ohlcv_data(security_id=security_id, date_from=date_from_obj, date_to=date_to_obj, timeframe=timeframe, import_type=import_type)
+            import_result = ohlcv_service.import_ohlcv_data(security_id=security_id, date_from=date_from_obj, date_to=date_to_obj, timeframe=timeframe, import_type=import_type, securities=securities)
 
             # Extract import stats
             import_stats = import_result.get('import_stats', {})
@@ -340,9 +341,9 @@ def backfill_missing_ohlcv_data(self, security_ids: Optional[list] = None, date_
 
             for i, security_id in enumerate(missing_securities):
                 try:
-                    # Update progress
+                    # Update progress (throttled: each update is a Celery state push plus several DB commits)
                     progress = 30 + ((i / len(missing_securities)) * 60)  # 30% to 90%
-                    self._update_progress(int(progress), f'Backfilling data for security {i+1}/{len(missing_securities)}...')
+                    self._update_progress_throttled(int(progress), f'Backfilling data for security {i+1}/{len(missing_securities)}...')
 
                     # Import OHLCV data for this security
                     single_import_result = ohlcv_service.import_ohlcv_data(security_id=str(security_id), date_from=date_from_obj, date_to=date_to_obj, import_type="BACKFILL")
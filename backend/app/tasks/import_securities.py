@@ -112,7 +112,7 @@ def import_securities_from_dhan(self) -> Dict[str, Any]:
         self._update_progress(35, 'Processing securities data...')
 
         try:
-            processed_securities = dhan_service.process_securities_data(clean_df)
+            processed_securities = dhan_service.process_securities_data(clean_df, validated=True)
             total_processed = len(processed_securities)
 
             self.complete_step('process_data', f'Processed {total_processed} securities', {'total_processed': total_processed, 'processing_timestamp': datetime.now().isoformat()})
@@ -0,0 +1,85 @@
+# backend/app/utils/rate_limiter.py
+"""
+Redis-backed token bucket rate limiter for external API calls.
+"""
+
+import threading
+import time
+
+from app.utils.redis_client import get_redis_client
+
+# Atomic token bucket kept in a Redis hash (tokens, ts). Refill, check and reservation happen in one round trip,
+# timed by the Redis server clock so every process shares one timeline.
+# KEYS[1] bucket key; ARGV: rate per second, capacity, tokens requested, max wait in microseconds (-1 for no limit).
+# Returns the microseconds the caller must sleep before using its tokens, or -1 if that exceeds max wait.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local max_wait_us = tonumber(ARGV[4])
+
+local clock = redis.call('TIME')
+local now_us = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local last_us = tonumber(state[2]) or now_us
+tokens = math.min(capacity, tokens + (now_us - last_us) * rate / 1000000)
+
+local wait_us = 0
+if tokens < requested then
+    wait_us = math.ceil((requested - tokens) * 1000000 / rate)
+    if max_wait_us >= 0 and wait_us > max_wait_us then
+        return -1
+    end
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - requested, 'ts', now_us)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens + requested) * 1000 / rate) + 1000)
+return wait_us
+"""
+
+# One registered token bucket script per Redis URL for the whole process
+_token_bucket_scripts = {}
+_scripts_lock = threading.Lock()
+
+
+def _get_token_bucket_script(redis_url: str):
+    """Get the token bucket script registered on the process-wide client for redis_url"""
+    with _scripts_lock:
+        script = _token_bucket_scripts.get(redis_url)
+        if script is None:
+            # The SHA is computed once here; calls use EVALSHA and reload the script only on NOSCRIPT
+            script = get_redis_client(redis_url).register_script(TOKEN_BUCKET_LUA)
+            _token_bucket_scripts[redis_url] = script
+    return script
+
+
+class RedisTokenBucketRateLimiter:
+    """Token bucket shared through Redis, so every process calling the same API draws from one budget"""
+
+    __slots__ = ('key', 'rate', 'capacity', '_script')
+
+    def __init__(self, redis_url: str, key: str, rate: float, capacity: int = None):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._script = _get_token_bucket_script(redis_url)
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> bool:
+        """Take `tokens`, sleeping until they accrue; returns False without taking any if that would exceed timeout"""
+        max_wait_us = -1 if timeout is None else int(timeout * 1_000_000)
+        wait_us = self._script(keys=[self.key], args=[self.rate, self.capacity, tokens, max_wait_us])
+
+        if wait_us < 0:
+            return False
+        if wait_us > 0:
+            time.sleep(wait_us / 1_000_000)
+        return True
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
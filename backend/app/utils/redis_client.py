@@ -0,0 +1,22 @@
+# backend/app/utils/redis_client.py
+"""
+Process-wide Redis clients shared by rate limiters and caches.
+"""
+
+import threading
+
+import redis
+
+# One client (and connection pool) per Redis URL for the whole process
+_redis_clients = {}
+_redis_lock = threading.Lock()
+
+
+def get_redis_client(redis_url: str) -> redis.Redis:
+    """Get the process-wide client for redis_url, creating it on first use"""
+    with _redis_lock:
+        client = _redis_clients.get(redis_url)
+        if client is None:
+            client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(redis_url, max_connections=32, socket_timeout=5))
+            _redis_clients[redis_url] = client
+    return client